@@ -1,20 +1,139 @@
 import sqlite3
 import datetime
-import json # For storing list of features if needed, or other complex types
+import hashlib
 import os
+from typing import Any, NamedTuple, Optional
+
+import orjson # Much faster than stdlib json for the raw_data blobs written on every insert/update
+
+# Price text as the web view used to clean it in Python: without "zł" and spaces, "," as decimal point,
+# then str.strip() - which also removes other whitespace (e.g. the non-breaking space) at both ends
+_PRICE_TEXT_SQL = ("TRIM(REPLACE(REPLACE(REPLACE(price, 'zł', ''), ' ', ''), ',', '.'), "
+                   "char(9, 10, 11, 12, 13, 160, 8201, 8239, 12288))")
+# Numeric price for sorting in SQL; NULL where the old float() call failed (e.g. "Zapytaj o cenę", "1.200.000").
+# Unlike float(), signs and exponents ("-5", "1e5") are not accepted either - prices never use them.
+PRICE_NUM_SQL = (f"CASE WHEN {_PRICE_TEXT_SQL} GLOB '*[0-9]*' AND {_PRICE_TEXT_SQL} NOT GLOB '*[^0-9.]*' "
+                 f"AND {_PRICE_TEXT_SQL} NOT GLOB '*.*.*' THEN CAST({_PRICE_TEXT_SQL} AS REAL) END")
+
+# Columns added after the original schema: init_db adds them to existing databases
+MIGRATED_COLUMNS = {
+    'raw_hash': 'TEXT',
+    'etag': 'TEXT',
+    'last_modified': 'TEXT',
+    # Generated from price; ALTER TABLE can only add VIRTUAL generated columns, which can still be indexed
+    'price_num': f'REAL GENERATED ALWAYS AS ({PRICE_NUM_SQL}) VIRTUAL',
+    # Display fields taken out of raw_data when it is written, so the web view doesn't decode raw_data
+    'area_m2': 'TEXT',
+    'main_image': 'TEXT',
+}
+
+# Columns written from a listing's raw_data dict, in the order returned by raw_data_columns()
+RAW_DATA_COLUMNS = ('raw_data', 'raw_hash', 'area_m2', 'main_image')
+
+# Weight of the latest run in a scraper's average duration (scrape_stats)
+SCRAPE_STATS_EMA_ALPHA = 0.3
+
+def serialize_raw_data(raw_data):
+    """
+    Serializes a listing's raw_data dict once for both the raw_data and raw_hash columns.
+    :return: Tuple of (JSON text, digest of that text).
+    """
+    serialized = orjson.dumps(raw_data, option=orjson.OPT_SORT_KEYS)
+    return serialized.decode('utf-8'), hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+def compute_raw_hash(raw_data):
+    """Returns a stable digest of a listing's raw_data dict, used to skip rewriting unchanged listings."""
+    return serialize_raw_data(raw_data)[1]
+
+def _column_value(value):
+    """Scraped values are usually str/int/float; anything else is stored as its text form."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+def extract_display_fields(raw_data):
+    """
+    Picks the fields shown by the web view that only exist inside raw_data.
+    :return: Tuple of (area_m2, main_image).
+    """
+    images = raw_data.get('images')
+    image_urls = raw_data.get('image_urls')
+    # Get main image - try multiple possible fields
+    main_image = (
+        raw_data.get('first_image_url') or
+        raw_data.get('main_image') or
+        (images[0] if images else None) or
+        (image_urls[0] if image_urls else None)
+    )
+    return _column_value(raw_data.get('area_m2')), _column_value(main_image)
+
+def raw_data_columns(raw_data):
+    """Values of the RAW_DATA_COLUMNS for a listing's raw_data dict."""
+    return (*serialize_raw_data(raw_data), *extract_display_fields(raw_data))
+
+class NewListing(NamedTuple):
+    """
+    A listing queued for insertion by apply_changes. Lighter than a dict per listing,
+    and its first seven fields are already in the column order of the INSERT.
+    """
+    url: str
+    site_name: str
+    title: Optional[str]
+    price: Optional[str]
+    description: Optional[str]
+    image_count: Optional[int]
+    first_image_url: Optional[str]
+    raw_data: Any # dict of all scraped data, stored as JSON
+
+class ListingSnapshot(NamedTuple):
+    """
+    The stored state of a listing needed to sync it with freshly scraped data (see get_listings_by_urls).
+    The first five fields are the dedicated columns compared by the scraper, in this order.
+    """
+    title: Optional[str]
+    price: Optional[str]
+    description: Optional[str]
+    image_count: Optional[int]
+    first_image_url: Optional[str]
+    raw_hash: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+LISTING_SNAPSHOT_COLUMNS = ', '.join(ListingSnapshot._fields)
 
 class DatabaseManager:
     def __init__(self, db_name):
         self.db_name = os.path.join("/app/data", db_name)
 
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_name)
+        # Scrapers run in parallel threads and may wait for each other's write transaction
+        conn = sqlite3.connect(self.db_name, timeout=30)
         conn.row_factory = sqlite3.Row # Access columns by name
+        # Safe with WAL: a crash can lose the last commits but never corrupts the database
+        conn.execute("PRAGMA synchronous=NORMAL")
         return conn
 
     def init_db(self):
         conn = self._get_connection()
         cursor = conn.cursor()
+        # Write-ahead log: readers (web service) don't block the scraper's batched writes
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # The web service and the scraper both run this at startup: the schema is checked and migrated under
+        # the write lock, so a second process waits and then sees the columns the first one added
+        # (otherwise both could try to ADD COLUMN and one would fail with "duplicate column name")
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            self._create_schema(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        print(f"Database '{self.db_name}' initialized/checked.")
+
+    def _create_schema(self, cursor):
+        """Creates the tables and indexes and migrates older schemas (called inside init_db's transaction)."""
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS listings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -26,17 +145,70 @@ class DatabaseManager:
             image_count INTEGER,
             first_image_url TEXT,
             raw_data TEXT, -- Store all scraped data as JSON
+            raw_hash TEXT, -- Digest of raw_data (see compute_raw_hash)
+            etag TEXT, -- ETag of the detail page, sent back as If-None-Match
+            last_modified TEXT, -- Last-Modified of the detail page, sent back as If-Modified-Since
+            area_m2 TEXT, -- From raw_data, for the web view (see extract_display_fields)
+            main_image TEXT, -- From raw_data, for the web view (see extract_display_fields)
             first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """)
+        # table_xinfo (unlike table_info) also lists generated columns
+        existing_columns = {row['name'] for row in cursor.execute("PRAGMA table_xinfo(listings)")}
+        if 'price_num' in existing_columns:
+            self._drop_outdated_price_num(cursor, existing_columns)
+        added_columns = set()
+        for column, column_type in MIGRATED_COLUMNS.items():
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE listings ADD COLUMN {column} {column_type}")
+                added_columns.add(column)
+                print(f"Added missing column '{column}' to listings table.")
+        if added_columns & {'area_m2', 'main_image'}:
+            self._backfill_display_fields(cursor)
         # Add indexes for faster lookups
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_url ON listings (url)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_site_name ON listings (site_name)")
-        conn.commit()
-        conn.close()
-        print(f"Database '{self.db_name}' initialized/checked.")
+        # Sort orders of the web view
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_price_num ON listings (price_num)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_first_seen ON listings (first_seen)")
+        # MAX(last_updated) versions the web view's page cache
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_last_updated ON listings (last_updated)")
+        # Typical run time of each scraper, used to start the longest ones first
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_stats (
+            scraper_name TEXT PRIMARY KEY,
+            avg_seconds REAL NOT NULL -- Exponential moving average (see SCRAPE_STATS_EMA_ALPHA)
+        )
+        """)
+
+    def _drop_outdated_price_num(self, cursor, existing_columns):
+        """Drops price_num if it was generated from an older PRICE_NUM_SQL, so init_db re-adds it with the current one."""
+        table_sql = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'listings'").fetchone()[0]
+        if PRICE_NUM_SQL in table_sql:
+            return
+        try:
+            cursor.execute("DROP INDEX IF EXISTS idx_listings_price_num")
+            cursor.execute("ALTER TABLE listings DROP COLUMN price_num") # Needs SQLite 3.35+
+            existing_columns.discard('price_num')
+            print("Dropped outdated generated column 'price_num' from listings table.")
+        except sqlite3.Error as e:
+            print(f"Could not update generated column 'price_num', keeping the old one: {e}")
+
+    def _backfill_display_fields(self, cursor):
+        """Fills area_m2 / main_image of listings stored before these columns existed (decodes raw_data once)."""
+        rows = cursor.execute("SELECT id, raw_data FROM listings WHERE raw_data IS NOT NULL").fetchall()
+        values = []
+        for row in rows:
+            try:
+                raw_data = orjson.loads(row['raw_data'])
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(raw_data, dict):
+                values.append((*extract_display_fields(raw_data), row['id']))
+        cursor.executemany("UPDATE listings SET area_m2 = ?, main_image = ? WHERE id = ?", values)
+        print(f"Filled area_m2/main_image for {len(values)} existing listings.")
 
     def get_listing_by_url(self, url):
         conn = self._get_connection()
@@ -46,6 +218,25 @@ class DatabaseManager:
         conn.close()
         return listing
 
+    def get_listings_by_urls(self, urls):
+        """Fetches many listings in one query. Returns a dict mapping url -> ListingSnapshot for the URLs found."""
+        listings = {}
+        urls = list(urls)
+        if not urls:
+            return listings
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = None # Plain tuples, unpacked positionally below
+        # Stay below SQLite's default limit of 999 bound parameters per statement
+        for start in range(0, len(urls), 900):
+            chunk = urls[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f"SELECT url, {LISTING_SNAPSHOT_COLUMNS} FROM listings WHERE url IN ({placeholders})", chunk)
+            for url, *columns in cursor.fetchall():
+                listings[url] = ListingSnapshot(*columns)
+        conn.close()
+        return listings
+
     def add_listing(self, data):
         conn = self._get_connection()
         cursor = conn.cursor()
@@ -61,7 +252,7 @@ class DatabaseManager:
             data.get('description'),
             data.get('image_count'),
             data.get('first_image_url'), # Added first_image_url
-            json.dumps(data), # Store all data as JSON
+            *raw_data_columns(data.get('raw_data', data)), # Store all scraped data as JSON (+ hash, display fields)
             datetime.datetime.now(), # last_updated
             datetime.datetime.now()  # last_checked
         )
@@ -69,8 +260,8 @@ class DatabaseManager:
 
         try:
             cursor.execute("""
-            INSERT INTO listings (url, site_name, title, price, description, image_count, first_image_url, raw_data, last_updated, last_checked)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO listings (url, site_name, title, price, description, image_count, first_image_url, raw_data, raw_hash, area_m2, main_image, last_updated, last_checked)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, listing_data_tuple)
             conn.commit()
             print(f"Added new listing: {data.get('url')}")
@@ -99,10 +290,10 @@ class DatabaseManager:
         
         # Update raw_data column with the value from update_data['raw_data']
         if 'raw_data' in update_data:
-            set_clauses.append("raw_data = ?")
             # update_data['raw_data'] is expected to be the dictionary of all current listing details
             print(f"DB_MANAGER (update_listing): Value for DB raw_data column from payload['raw_data']: {update_data['raw_data']}")
-            values.append(json.dumps(update_data['raw_data']))
+            set_clauses.extend(f"{column} = ?" for column in RAW_DATA_COLUMNS)
+            values.extend(raw_data_columns(update_data['raw_data']))
         else:
             # This should ideally not happen if BaseScraper correctly prepares the payload
             print(f"DB_MANAGER (update_listing): WARNING - 'raw_data' key not found in update_data for {url}. Raw_data DB column will not be updated.")
@@ -110,7 +301,7 @@ class DatabaseManager:
         # If only raw_data was set (e.g. no direct_column_fields were in update_data, which is unlikely but possible),
         # set_clauses would still not be empty.
         # The original check for empty set_clauses might be too strict if we always add raw_data.
-        # However, if update_data itself was empty, json.dumps({}) is "{}", which is valid.
+        # However, if update_data itself was empty, an empty dict still serializes to "{}", which is valid.
 
         # Always update last_updated and last_checked timestamps
         set_clauses.append("last_updated = ?")
@@ -134,6 +325,96 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def apply_changes(self, inserts=(), updates=(), touches=(), validators=()):
+        """
+        Writes a batch of listing changes (e.g. one scraped page) in a single transaction.
+        :param inserts: list of NewListing records. Existing URLs are skipped.
+        :param updates: list of (url, update_data) pairs, same shape as for update_listing.
+        :param touches: list of URLs whose last_checked timestamp should be refreshed.
+        :param validators: list of (url, etag, last_modified) HTTP cache validators of the detail pages.
+        """
+        if not inserts and not updates and not touches and not validators:
+            return
+        direct_column_fields = ['title', 'price', 'description', 'image_count', 'first_image_url', 'site_name']
+
+        # raw_data is serialized before taking the write lock; the timestamps are added inside the transaction
+        insert_values = [(
+            *listing[:7], # url ... first_image_url
+            *raw_data_columns(listing.raw_data) # raw_data, raw_hash, area_m2, main_image
+        ) for listing in inserts]
+
+        # executemany needs one statement per distinct set of updated columns
+        update_groups = {}
+        for url, update_data in updates:
+            fields = tuple(field for field in direct_column_fields if field in update_data)
+            has_raw_data = 'raw_data' in update_data
+            values = [update_data[field] for field in fields]
+            if has_raw_data:
+                values.extend(raw_data_columns(update_data['raw_data']))
+            update_groups.setdefault((fields, has_raw_data), []).append((values, url))
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Taken while holding the write lock, so last_updated grows in commit order even with parallel
+            # scrapers (the web view's ETag relies on MAX(last_updated) changing with every write)
+            now = datetime.datetime.now()
+            if inserts:
+                cursor.executemany("""
+                INSERT OR IGNORE INTO listings (url, site_name, title, price, description, image_count, first_image_url, raw_data, raw_hash, area_m2, main_image, last_updated, last_checked)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(*values, now, now) for values in insert_values]) # ..., last_updated, last_checked
+            for (fields, has_raw_data), rows in update_groups.items():
+                set_clauses = [f"{field} = ?" for field in fields]
+                if has_raw_data:
+                    set_clauses.extend(f"{column} = ?" for column in RAW_DATA_COLUMNS)
+                set_clauses.extend(("last_updated = ?", "last_checked = ?"))
+                cursor.executemany(f"UPDATE listings SET {', '.join(set_clauses)} WHERE url = ?",
+                                   [(*values, now, now, url) for values, url in rows])
+            if touches:
+                cursor.executemany("UPDATE listings SET last_checked = ? WHERE url = ?",
+                                   [(now, url) for url in touches])
+            if validators:
+                cursor.executemany("UPDATE listings SET etag = ?, last_modified = ? WHERE url = ?",
+                                   [(etag, last_modified, url) for url, etag, last_modified in validators])
+            conn.commit()
+            print(f"Saved batch: {len(inserts)} new, {len(updates)} updated, {len(touches)} checked listings.")
+        except Exception as e:
+            conn.rollback()
+            print(f"Error saving batch of listing changes: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def get_scrape_durations(self):
+        """
+        Returns the average run time of each scraper.
+        :return: dict mapping scraper class names to seconds.
+        """
+        conn = self._get_connection()
+        try:
+            return dict(conn.execute("SELECT scraper_name, avg_seconds FROM scrape_stats").fetchall())
+        except Exception as e:
+            print(f"Error reading scrape stats: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def record_scrape_duration(self, scraper_name, seconds):
+        """Folds the duration of a finished run into the scraper's moving average."""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+            INSERT INTO scrape_stats (scraper_name, avg_seconds) VALUES (?, ?)
+            ON CONFLICT(scraper_name) DO UPDATE SET avg_seconds = ? * excluded.avg_seconds + ? * avg_seconds
+            """, (scraper_name, seconds, SCRAPE_STATS_EMA_ALPHA, 1 - SCRAPE_STATS_EMA_ALPHA))
+            conn.commit()
+        except Exception as e:
+            print(f"Error recording scrape duration for {scraper_name}: {e}")
+        finally:
+            conn.close()
+
     def update_last_checked(self, url):
         """Updates only the last_checked timestamp for a listing."""
         conn = self._get_connection()
@@ -1,6 +1,13 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import datetime # Added import for datetime
+import threading
+import time
+
+# Usuwa spacje i zamienia przecinek dziesiętny na kropkę jednym przejściem ("zł" usuwa się wcześniej jako całość)
+_PRICE_TRANS = str.maketrans({' ': None, ',': '.'})
 
 class NotificationManager:
     def __init__(self, webhook_url):
@@ -8,7 +15,14 @@ class NotificationManager:
         self.ignore_identical_values = False
         self.last_notification_time = None
         self.notification_queue = []
+        self._lock = threading.Lock()  # Jedna instancja jest współdzielona przez scrapery działające w wątkach
         self.MIN_NOTIFICATION_INTERVAL = 1.0  # Minimalny odstęp między powiadomieniami w sekundach
+        self.MAX_EMBEDS_PER_MESSAGE = 10  # Limit Discorda: embedy w jednej wiadomości webhooka
+        self.MAX_EMBED_CHARS_PER_MESSAGE = 6000  # Limit Discorda: łączna liczba znaków embedów w wiadomości
+        # Jedna sesja na cały run - kolejne webhooki korzystają z otwartego połączenia (bez ponownego TCP/TLS)
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                                    max_retries=Retry(total=3, backoff_factor=0.3)))
         if not self.webhook_url:
             print("Discord webhook URL not provided. Notifications will be disabled.")
         elif not self.webhook_url.startswith("https://discord.com/api/webhooks/"):
@@ -20,12 +34,51 @@ class NotificationManager:
             return
 
         # Dodaj powiadomienie do kolejki
-        self.notification_queue.append({
-            'message_content': message_content,
-            'embed': embed,
-            'timestamp': datetime.datetime.now()
-        })
-        self._process_queue()
+        with self._lock:
+            self.notification_queue.append({
+                'message_content': message_content,
+                'embed': embed,
+                'timestamp': datetime.datetime.now()
+            })
+            self._process_queue()
+
+    def flush(self):
+        """Wysyła wszystkie zaległe powiadomienia z kolejki, odczekując wymagany odstęp między wiadomościami"""
+        with self._lock:
+            while self.notification_queue:
+                if self.last_notification_time:
+                    elapsed = (datetime.datetime.now() - self.last_notification_time).total_seconds()
+                    if elapsed < self.MIN_NOTIFICATION_INTERVAL:
+                        time.sleep(self.MIN_NOTIFICATION_INTERVAL - elapsed)
+                queue_size = len(self.notification_queue)
+                self._process_queue()
+                if len(self.notification_queue) >= queue_size:
+                    break  # Wysyłka nie powiodła się - reszta zostaje w kolejce na następny flush
+
+    def send_embeds(self, embeds):
+        """Wysyła embedy zgrupowane po kilka w jednej wiadomości zamiast osobnej wiadomości na każdy embed"""
+        batch = []
+        batch_chars = 0
+        for embed in embeds:
+            if not embed:
+                continue
+            embed_chars = self._embed_text_length(embed)
+            if batch and (len(batch) >= self.MAX_EMBEDS_PER_MESSAGE or
+                          batch_chars + embed_chars > self.MAX_EMBED_CHARS_PER_MESSAGE):
+                self.send_notification(embed=batch)
+                batch, batch_chars = [], 0
+            batch.append(embed)
+            batch_chars += embed_chars
+        if batch:
+            self.send_notification(embed=batch)
+
+    @staticmethod
+    def _embed_text_length(embed):
+        """Liczba znaków embedu wliczana przez Discorda do limitu na wiadomość"""
+        length = len(embed.get('title') or '') + len(embed.get('description') or '')
+        for field in embed.get('fields', []):
+            length += len(field.get('name') or '') + len(field.get('value') or '')
+        return length
 
     def _process_queue(self):
         """Przetwarza kolejkę powiadomień z uwzględnieniem limitów Discord"""
@@ -55,7 +108,7 @@ class NotificationManager:
         
         try:
             #print("wylaczone powiadomienia")
-            response = requests.post(self.webhook_url, data=json.dumps(payload), headers=headers, timeout=10)
+            response = self._session.post(self.webhook_url, data=json.dumps(payload), headers=headers, timeout=10)
             response.raise_for_status()
             self.last_notification_time = current_time
             print(f"Discord notification sent successfully. Queue size: {len(self.notification_queue)}")
@@ -72,10 +125,11 @@ class NotificationManager:
         if price is None:
             return "N/A"
         try:
-            # First clean any existing formatting
+            # First clean any existing formatting (non-numeric prices are shown as they were)
+            cleaned = price
             if isinstance(price, str):
-                price = price.replace(' ', '').replace(',', '.').replace('zł', '').strip()
-            price_float = float(price)
+                cleaned = price.replace('zł', '').translate(_PRICE_TRANS).strip()
+            price_float = float(cleaned)
             if price_float.is_integer():
                 return f"{int(price_float):,} zł".replace(",", " ")
             return f"{price_float:,.2f} zł".replace(",", " ").replace(".", ",")
@@ -3,8 +3,13 @@ import pkgutil
 import importlib
 import os
 import sys
-import inspect
 import argparse
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from common import config
 # Bezwzględne importy menedżerów i konfiguracji
@@ -13,12 +18,22 @@ from common.notification_manager import NotificationManager
 import common.config
 from scrapers.base_scraper import BaseScraper
 
+# Ile scraperów (różnych serwisów) działa równocześnie - praca to głównie oczekiwanie na sieć
+MAX_PARALLEL_SCRAPERS = 8
+
+# Wynik odkrywania scraperów - moduły importujemy tylko raz na proces
+_SCRAPER_CLASSES = None
+
 def discover_scrapers(scrapers_package_dir="scrapers"):
     """
     Dynamically discovers scraper classes in the specified directory.
     Scraper classes must inherit from BaseScraper.
     Returns a dict mapping class names to classes.
+    The result is cached; callers get their own copy to modify.
     """
+    global _SCRAPER_CLASSES
+    if _SCRAPER_CLASSES is not None:
+        return dict(_SCRAPER_CLASSES)
 
     scraper_classes = {}
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -28,21 +43,30 @@ def discover_scrapers(scrapers_package_dir="scrapers"):
         print(f"Error: Scrapers directory '{scrapers_abs_path}' not found.")
         return scraper_classes
 
-    # Iterate through .py files in scrapers directory
-    for filename in os.listdir(scrapers_abs_path):
-        if not filename.endswith(".py") or filename in ("__init__.py", "base_scraper.py"):
+    # Iterate through modules in scrapers directory
+    for _, module_name, _ in pkgutil.iter_modules([scrapers_abs_path]):
+        if module_name == "base_scraper":
             continue
 
-        module_name = filename[:-3]
         full_module_path = f"{scrapers_package_dir}.{module_name}"
         try:
             module = importlib.import_module(full_module_path)
-            for _, obj in inspect.getmembers(module, inspect.isclass):
-                if issubclass(obj, BaseScraper) and obj is not BaseScraper:
+            for obj in vars(module).values():
+                if isinstance(obj, type) and issubclass(obj, BaseScraper) and obj is not BaseScraper:
                     scraper_classes[obj.__name__] = obj
         except Exception as e:
             print(f"Error loading {full_module_path}: {e}")
-    return scraper_classes
+
+    _SCRAPER_CLASSES = scraper_classes
+    return dict(scraper_classes)
+
+def run_scraper(cls_name, cls, db_manager, notification_manager, search_criteria):
+    """Runs a single scraper (one thread of the pool in main) and records how long it took."""
+    started = time.monotonic()
+    scraper = cls(db_manager=db_manager, notification_manager=notification_manager)
+    print(f"[{cls_name}] Running with criteria: {search_criteria}")
+    scraper.scrape(search_criteria)
+    db_manager.record_scrape_duration(cls_name, time.monotonic() - started)
 
 def main():
     # --- CLI arguments ---
@@ -51,8 +75,22 @@ def main():
         "--only", "-o", nargs="+", metavar="ScraperClass",
         help="Nazwy klas scraperów do uruchomienia (domyślnie wszystkie)"
     )
+    parser.add_argument(
+        "--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Poziom logowania scraperów (domyślnie WARNING)"
+    )
     args = parser.parse_args()
 
+    # --- Logowanie ---
+    # Wątki scraperów tylko wrzucają rekordy do kolejki; zapis na stdout robi osobny wątek QueueListener
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    logging.basicConfig(level=args.log_level, handlers=[logging.handlers.QueueHandler(log_queue)])
+    log_listener.start()
+    atexit.register(log_listener.stop)  # Opróżnia kolejkę przed zakończeniem procesu
+
     # --- Ścieżki i menedżery ---
     project_root = os.path.dirname(os.path.abspath(__file__))
     if project_root not in sys.path:
@@ -97,15 +135,30 @@ def main():
         'min_area': 25
     }
 
-    # --- Uruchamianie ---
-    for cls_name, cls in sorted(to_run):
-        try:
-            scraper = cls(db_manager=db_manager, notification_manager=notification_manager)
-            print(f"[{cls_name}] Running with criteria: {search_criteria}")
-            scraper.scrape(search_criteria)
-            print(f"[{cls_name}] Completed successfully\n")
-        except Exception as e:
-            print(f"[{cls_name}] ERROR: {e}\n")
+    if not to_run:
+        return
+
+    # Najdłużej działające scrapery startują pierwsze (LPT), żeby nie kończyły runu same na końcu;
+    # nowe (bez statystyk) idą na koniec w kolejności alfabetycznej
+    durations = db_manager.get_scrape_durations()
+    to_run.sort(key=lambda item: (-durations.get(item[0], 0.0), item[0]))
+
+    # --- Uruchamianie (scrapery różnych serwisów równolegle) ---
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_SCRAPERS, len(to_run))) as executor:
+        futures = {
+            executor.submit(run_scraper, cls_name, cls, db_manager, notification_manager, search_criteria): cls_name
+            for cls_name, cls in to_run
+        }
+        for future in as_completed(futures):
+            cls_name = futures[future]
+            try:
+                future.result()
+                print(f"[{cls_name}] Completed successfully\n")
+            except Exception as e:
+                print(f"[{cls_name}] ERROR: {e}\n")
+
+    # Powiadomienia, które zostały w kolejce (np. po błędzie wysyłki) - wyślij przed zakończeniem
+    notification_manager.flush()
 
 if __name__ == "__main__":
     main()
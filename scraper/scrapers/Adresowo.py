@@ -3,14 +3,18 @@ from bs4 import BeautifulSoup
 import re
 from .base_scraper import BaseScraper
 
+# Patterns used for every listing on a page, compiled once at import
+_LISTING_HREF_RE = re.compile(r'^/o/')
+_SUMMARY_AREA_RE = re.compile(r'Powierzchnia.*?(\d+[\.,]?\d*)\s*(m²|m2)', re.IGNORECASE)
+
 class AdresowoScraper(BaseScraper):
     """
     Scraper for Adresowo.pl real estate listings.
     Note: Adresowo.pl may have cookie consent banners or other mechanisms
     that can alter the HTML content received by simple `requests.get()`.
     If parsing fails, especially for price/images, this might be the cause.
-    Consider using a session object to handle cookies or a browser automation
-    tool like Selenium if issues persist.
+    Requests go through the shared session (cookies persist between calls);
+    consider a browser automation tool like Selenium if issues persist.
     """
 
     def __init__(self, db_manager=None, notification_manager=None):
@@ -38,10 +42,8 @@ class AdresowoScraper(BaseScraper):
                 'Accept-Language': 'en-US,en;q=0.9,pl;q=0.8', # Added accept-language
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
             }
-            # Using a session might help with cookie persistence if the site requires it
-            # s = requests.Session()
-            # response = s.get(self.hardcoded_listings_url, headers=headers, timeout=15)
-            response = requests.get(self.hardcoded_listings_url, headers=headers, timeout=15)
+            # The shared session keeps cookies between requests if the site requires it
+            response = self.session.get(self.hardcoded_listings_url, headers=headers, timeout=15)
             response.raise_for_status()  # Raise an exception for HTTP errors
             return response.text
         except requests.RequestException as e:
@@ -60,7 +62,7 @@ class AdresowoScraper(BaseScraper):
             print(f"[{self.site_name}] No HTML content to parse for listings.")
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         
         # Find all tags that are either a listing item or the stopper div, in document order.
@@ -87,7 +89,7 @@ class AdresowoScraper(BaseScraper):
             url_suffix = section.get('data-href')
             if not url_suffix:
                 # Fallback: try to find an <a> tag with the link within the section
-                link_tag = section.find('a', href=re.compile(r'^/o/'))
+                link_tag = section.find('a', href=_LISTING_HREF_RE)
                 if link_tag:
                     url_suffix = link_tag.get('href')
 
@@ -143,7 +145,7 @@ class AdresowoScraper(BaseScraper):
                 if 'Powierzchnia' in div_full_text:
                     # Nowe podejście do parsowania z uwzględnieniem pełnego tekstu
                     full_text = ' '.join(row_div.stripped_strings)
-                    area_match = re.search(r'Powierzchnia.*?(\d+[\.,]?\d*)\s*(m²|m2)', full_text, re.IGNORECASE)
+                    area_match = _SUMMARY_AREA_RE.search(full_text)
                     if area_match:
                         area_value = area_match.group(1).replace(',', '.')
                         area_m2 = f"{area_value} {area_match.group(2)}"
@@ -213,7 +215,7 @@ class AdresowoScraper(BaseScraper):
                 'Accept-Language': 'en-US,en;q=0.9,pl;q=0.8',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
             }
-            response = requests.get(listing_url, headers=headers, timeout=15)
+            response = self.session.get(listing_url, headers=headers, timeout=15)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
@@ -229,7 +231,7 @@ class AdresowoScraper(BaseScraper):
         if not html_content:
             return {}
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {}
 
         # Title
@@ -1,16 +1,25 @@
 # In a real scraper, you would import libraries like requests and BeautifulSoup:
 # import requests
 # from bs4 import BeautifulSoup
+import re
 import requests
 from bs4 import BeautifulSoup
 try:
-    from lxml import html as lxml_html
+    from lxml import etree, html as lxml_html
+    # XPath expression compiled once at import instead of being re-parsed by every tree.xpath() call
+    _AREA_XPATH = etree.XPath("/html/body/div[1]/article/div[2]/div/div/div[3]/div/section/div/div[1]/div/div/p[2]")
 except ImportError:
     lxml_html = None
 
 from .base_scraper import BaseScraper
 # import datetime # If you need to use datetime objects
 
+# Text matchers for label lookups, compiled once (BeautifulSoup runs them with a C-level search
+# instead of calling a Python lambda for every text node)
+_ROOMS_LABEL_RE = re.compile('Liczba pokoi')
+_AREA_LABEL_UPPER_RE = re.compile('POWIERZCHNIA')
+_AREA_LABEL_RE = re.compile('Powierzchnia')
+
 class DomiportaScraper(BaseScraper):
     """
     Scraper for Domiporta.pl real estate listings.
@@ -39,7 +48,7 @@ class DomiportaScraper(BaseScraper):
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept-Language': 'pl-PL,pl;q=0.9',
             }
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self.session.get(url, headers=headers, timeout=15)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
@@ -58,7 +67,7 @@ class DomiportaScraper(BaseScraper):
         if not html_content:
             return []
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         
         # Select items that have both 'grid-item' and 'grid-item--cover' classes,
@@ -87,7 +96,7 @@ class DomiportaScraper(BaseScraper):
             if area_tag:
                 details['area_m2'] = area_tag.get_text(strip=True).replace('\xa0', ' ')
                 
-            rooms_tag = item.find('div', string=lambda t: t and 'Liczba pokoi' in t)
+            rooms_tag = item.find('div', string=_ROOMS_LABEL_RE)
             if rooms_tag:
                 details['rooms'] = rooms_tag.find_next_sibling('div').get_text(strip=True)
 
@@ -126,9 +135,13 @@ class DomiportaScraper(BaseScraper):
                 'Accept-Language': 'pl-PL,pl;q=0.9',
                 'Referer': 'https://www.domiporta.pl/'
             }
-            response = requests.get(listing_url, headers=headers, timeout=15)
+            response = self.session.get(listing_url, headers=headers, timeout=15)
             response.raise_for_status()
             
+            # Not modified since the last scrape (conditional request) - nothing to parse
+            if response.status_code == 304:
+                return None
+
             # Check if we got a valid HTML response
             if 'text/html' not in response.headers.get('Content-Type', ''):
                 print(f"[{self.site_name}] Invalid content type for {listing_url}")
@@ -149,7 +162,7 @@ class DomiportaScraper(BaseScraper):
         if not html_content:
             return {}
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {}
 
         # Title
@@ -168,8 +181,7 @@ class DomiportaScraper(BaseScraper):
             try:
                 tree = lxml_html.fromstring(html_content)
                 # User-provided XPath
-                xpath_expression = "/html/body/div[1]/article/div[2]/div/div/div[3]/div/section/div/div[1]/div/div/p[2]"
-                elements = tree.xpath(xpath_expression)
+                elements = _AREA_XPATH(tree)
                 if elements:
                     # lxml's text_content() handles <sup> tags correctly by including their text.
                     extracted_value = elements[0].text_content().strip().replace('\xa0', ' ')
@@ -191,7 +203,7 @@ class DomiportaScraper(BaseScraper):
             #   <p class="features-short__name">POWIERZCHNIA</p>
             #   <p class="features-short__value-quadric">27,19 m<sup>2</sup></p>
             # </div>
-            area_label_tag = soup.find('p', class_='features-short__name', string=lambda t: t and 'POWIERZCHNIA' in t.strip())
+            area_label_tag = soup.find('p', class_='features-short__name', string=_AREA_LABEL_UPPER_RE)
             if area_label_tag:
                 area_value_tag = area_label_tag.find_next_sibling('p')
                 if area_value_tag:
@@ -225,7 +237,7 @@ class DomiportaScraper(BaseScraper):
         # Example: <span class="features__item_name">Powierzchnia</span> <span class="features__item_value">55 m²</span>
         if area_text is None:
             # Look for a span containing "Powierzchnia" (more generic than "Powierzchnia całkowita")
-            area_name_span = soup.find('span', class_='features__item_name', string=lambda t: t and 'Powierzchnia' in t.strip())
+            area_name_span = soup.find('span', class_='features__item_name', string=_AREA_LABEL_RE)
             if area_name_span:
                 area_value_span = area_name_span.find_next_sibling('span', class_='features__item_value')
                 if area_value_span:
@@ -239,7 +251,7 @@ class DomiportaScraper(BaseScraper):
         if area_text is None:
             # Search for <dt>Termin</dt> <dd>Definicja</dd> or <th>Nagłówek</th> <td>Dane</td>
             # Find label elements (dt, th) containing "Powierzchnia"
-            label_elements = soup.find_all(['dt', 'th'], string=lambda t: t and 'Powierzchnia' in t.strip())
+            label_elements = soup.find_all(['dt', 'th'], string=_AREA_LABEL_RE)
             for label_element in label_elements:
                 value_element = None
                 if label_element.name == 'dt':
@@ -2,7 +2,10 @@ import re
 import requests
 from bs4 import BeautifulSoup
 try:
-    from lxml import html as lxml_html
+    from lxml import etree, html as lxml_html
+    # XPath expressions compiled once at import instead of being re-parsed by every tree.xpath() call
+    _PRICE_XPATH = etree.XPath('//span[contains(@class,"price")]')
+    _AREA_XPATH = etree.XPath('//span[contains(text(),"m²") and not(contains(text(),"zł"))]')
 except ImportError:
     lxml_html = None
 
@@ -32,7 +35,7 @@ class GratkaScraper(BaseScraper):
         print(f"[{self.site_name}] Fetching listings page {page} using URL: {example_url} (Criteria: {search_criteria})")
 
         try:
-            response = requests.get(example_url, timeout=10)
+            response = self.session.get(example_url, timeout=10)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
@@ -49,7 +52,7 @@ class GratkaScraper(BaseScraper):
         if not html_content:
             return [], False
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
 
         listing_elements = soup.find_all(class_='card')
@@ -118,7 +121,7 @@ class GratkaScraper(BaseScraper):
         """
         print(f"[{self.site_name}] Fetching details for URL: {listing_url}")
         try:
-            response = requests.get(listing_url, timeout=10)
+            response = self.session.get(listing_url, timeout=10)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
@@ -146,7 +149,7 @@ class GratkaScraper(BaseScraper):
             'first_image_url': None
         }
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         parameters_section = soup.find('div', class_='parameters__items')  # aby uniknąć późniejszych błędów
 
         # Parsowanie przez lxml (jeśli dostępne)
@@ -159,7 +162,7 @@ class GratkaScraper(BaseScraper):
 
         if lxml_tree is not None:
             try:
-                price_el = lxml_tree.xpath('//span[contains(@class,"price")]')
+                price_el = _PRICE_XPATH(lxml_tree)
                 if price_el:
                     details['price'] = price_el[0].text_content().strip()
                     print(f"[{self.site_name}] Price (XPath): {details['price']}")
@@ -167,7 +170,7 @@ class GratkaScraper(BaseScraper):
                 print(f"[{self.site_name}] Error extracting price with XPath: {e}")
 
             try:
-                area_el = lxml_tree.xpath('//span[contains(text(),"m²") and not(contains(text(),"zł"))]')
+                area_el = _AREA_XPATH(lxml_tree)
                 if area_el:
                     details['area_m2'] = area_el[0].text_content().strip()
                     print(f"[{self.site_name}] Area (XPath): {details['area_m2']}")
@@ -2,13 +2,26 @@ import requests
 from bs4 import BeautifulSoup
 import re # For extracting area
 try:
-    from lxml import html as lxml_html
+    from lxml import etree, html as lxml_html
+    # XPath expressions compiled once at import instead of being re-parsed by every tree.xpath() call
+    _TITLE_XPATH = etree.XPath('/html/body/main/div[2]/div[2]/div/div/div[1]/div[1]/h2')
+    _PRICE_XPATH = etree.XPath('/html/body/main/div[2]/div[2]/div/div/div[1]/div[2]/div[1]/div[1]')
+    _DESCRIPTION_CONTAINER_PATH = '/html/body/main/div[2]/div[2]/div/div/div[1]/div[1]/div[9]'
+    _DESCRIPTION_CONTAINER_XPATH = etree.XPath(_DESCRIPTION_CONTAINER_PATH)
+    _UL_XPATH = etree.XPath('.//ul')
+    _LI_CHILD_XPATH = etree.XPath('./li')
+    _P_XPATH = etree.XPath('.//p')
+    _AREA_XPATH = etree.XPath('/html/body/main/div[2]/div[2]/div/div/div[1]/div[1]/div[9]/ul/li[2]/span[2]')
 except ImportError:
     lxml_html = None
 
 from .base_scraper import BaseScraper
 # import datetime # If you need to use datetime objects
 
+# Patterns used for every listing on a page, compiled once at import
+_LISTING_HREF_RE = re.compile(r',\d+\.html$')
+_SUMMARY_AREA_RE = re.compile(r'(\d[\d\s,.]*)\s*m2', re.IGNORECASE)
+
 class LentoScraper(BaseScraper):
     """
     Scraper for Lento.pl real estate listings.
@@ -34,7 +47,7 @@ class LentoScraper(BaseScraper):
         print(f"[{self.site_name}] Fetching listings page {page} using URL: {example_url} (Criteria: {search_criteria})")
         
         try:
-            response = requests.get(example_url, timeout=10)
+            response = self.session.get(example_url, timeout=10)
             response.raise_for_status()  # Raise an exception for HTTP errors
             return response.text
         except requests.exceptions.RequestException as e:
@@ -51,7 +64,7 @@ class LentoScraper(BaseScraper):
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         
         item_selectors = [
@@ -78,7 +91,7 @@ class LentoScraper(BaseScraper):
              potential_items = []
              for item_candidate in all_divs_articles:
                  # Check for a link that looks like a Lento listing URL (contains ,xxxx.html)
-                 link_tag = item_candidate.find('a', href=re.compile(r',\d+\.html$'))
+                 link_tag = item_candidate.find('a', href=_LISTING_HREF_RE)
                  # Check for a price tag (text ending with zł)
                  price_tag = item_candidate.find(lambda tag: tag.name in ['div', 'p', 'span', 'strong'] and tag.get_text(strip=True).endswith('zł'))
                  if link_tag and price_tag:
@@ -94,7 +107,7 @@ class LentoScraper(BaseScraper):
             summary = {}
             
             # URL and Title
-            link_tag = item_element.find('a', href=re.compile(r',\d+\.html$'))
+            link_tag = item_element.find('a', href=_LISTING_HREF_RE)
             if not link_tag:
                 title_heading = item_element.find(['h2', 'h3', 'h4'], class_=['title', 'item-title', 'title-A'])
                 if title_heading:
@@ -166,12 +179,12 @@ class LentoScraper(BaseScraper):
             if not attribute_elements: # If specific classes not found, search all text within the item
                 all_text_nodes_in_item = item_element.find_all(string=True, recursive=True)
                 item_full_text = " ".join(all_text_nodes_in_item)
-                match = re.search(r'(\d[\d\s,.]*)\s*m2', item_full_text, re.IGNORECASE)
+                match = _SUMMARY_AREA_RE.search(item_full_text)
                 if match:
                     area_text_found = match.group(0) # e.g., "37 m2"
             else:
                 for attr_element in attribute_elements:
-                    match = re.search(r'(\d[\d\s,.]*)\s*m2', attr_element.get_text(), re.IGNORECASE)
+                    match = _SUMMARY_AREA_RE.search(attr_element.get_text())
                     if match:
                         area_text_found = match.group(0)
                         break # Found area, no need to check other attribute elements
@@ -203,7 +216,7 @@ class LentoScraper(BaseScraper):
         """
         print(f"[{self.site_name}] Fetching details for URL: {listing_url}")
         try:
-            response = requests.get(listing_url, timeout=10)
+            response = self.session.get(listing_url, timeout=10)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
@@ -220,7 +233,7 @@ class LentoScraper(BaseScraper):
         if not html_content:
             return {}
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {
             'title': 'N/A',
             'price': 'N/A',
@@ -234,7 +247,7 @@ class LentoScraper(BaseScraper):
         if lxml_html and html_content: # Ensure lxml is available and html_content is not None
             try:
                 tree = lxml_html.fromstring(html_content)
-                title_elements = tree.xpath('/html/body/main/div[2]/div[2]/div/div/div[1]/div[1]/h2')
+                title_elements = _TITLE_XPATH(tree)
                 if title_elements:
                     details['title'] = title_elements[0].text_content().strip()
                     print(f"[{self.site_name}] Title (XPath): {details['title']}")
@@ -267,7 +280,7 @@ class LentoScraper(BaseScraper):
                 if 'tree' not in locals() or tree is None: # Check if tree exists from title parsing
                     tree = lxml_html.fromstring(html_content)
                 
-                price_elements = tree.xpath('/html/body/main/div[2]/div[2]/div/div/div[1]/div[2]/div[1]/div[1]')
+                price_elements = _PRICE_XPATH(tree)
                 if price_elements:
                     details['price'] = price_elements[0].text_content().strip()
                     print(f"[{self.site_name}] Price (XPath): {details['price']}")
@@ -302,8 +315,8 @@ class LentoScraper(BaseScraper):
                     tree = lxml_html.fromstring(html_content)
                 
                 # XPath provided by user for the main description container
-                description_container_xpath = '/html/body/main/div[2]/div[2]/div/div/div[1]/div[1]/div[9]'
-                description_elements = tree.xpath(description_container_xpath)
+                description_container_xpath = _DESCRIPTION_CONTAINER_PATH
+                description_elements = _DESCRIPTION_CONTAINER_XPATH(tree)
 
                 if description_elements:
                     print(f"[{self.site_name}] DEBUG: Found description container with XPath: {description_container_xpath}")
@@ -313,10 +326,10 @@ class LentoScraper(BaseScraper):
                     # Prioritize list items, then paragraphs, then general text content
                     lines = []
                     # Check for <ul> -> <li> structure
-                    ul_tags = container_element.xpath('.//ul') # Find all ul descendants
+                    ul_tags = _UL_XPATH(container_element) # Find all ul descendants
                     processed_li = False
                     for ul in ul_tags:
-                        li_tags = ul.xpath('./li') # Find direct li children of this ul
+                        li_tags = _LI_CHILD_XPATH(ul) # Find direct li children of this ul
                         for li in li_tags:
                             line_text = li.text_content().strip()
                             if line_text:
@@ -328,7 +341,7 @@ class LentoScraper(BaseScraper):
 
                     # If no <li> items were processed, try <p> tags
                     if not processed_li:
-                        p_tags = container_element.xpath('.//p') # Find all p descendants
+                        p_tags = _P_XPATH(container_element) # Find all p descendants
                         for p_tag in p_tags:
                             line_text = p_tag.text_content().strip()
                             if line_text:
@@ -385,7 +398,7 @@ class LentoScraper(BaseScraper):
         
         if lxml_html and 'tree' in locals() and tree is not None: # Check if tree was successfully parsed
             try:
-                area_elements = tree.xpath('/html/body/main/div[2]/div[2]/div/div/div[1]/div[1]/div[9]/ul/li[2]/span[2]')
+                area_elements = _AREA_XPATH(tree)
                 if area_elements:
                     details['area_m2'] = area_elements[0].text_content().strip()
                     print(f"[{self.site_name}] Area (XPath): {details['area_m2']}")
@@ -2,13 +2,23 @@ import requests
 from bs4 import BeautifulSoup
 import re
 try:
-    from lxml import html as lxml_html
+    from lxml import etree, html as lxml_html
+    # XPath expressions compiled once at import instead of being re-parsed by every tree.xpath() call
+    _TITLE_XPATH = etree.XPath('/html/body/div[1]/div[2]/main/div[1]/div[4]/section/div/h1')
+    _PRICE_XPATH = etree.XPath('/html/body/div[1]/div[2]/main/div[1]/div[4]/section/div/div[1]/div/span[1]')
+    _FIRST_IMAGE_XPATH = etree.XPath('/html/body/div[1]/div[2]/main/div[1]/div[3]/div[1]/button[1]/img')
 except ImportError:
     lxml_html = None
 
 from .base_scraper import BaseScraper
 # import datetime # If you need to use datetime objects
 
+# Text matchers for label lookups, compiled once instead of a Python lambda per text node
+_AREA_TOTAL_LABEL_RE = re.compile(re.escape('Pow. całkowita'))
+_AREA_LABEL_RE = re.compile('Powierzchnia')
+# Listing link pattern, checked once per listing on a page
+_LISTING_HREF_RE = re.compile(r'^/oferta/')
+
 class MorizonScraper(BaseScraper):
     """
     Scraper for Morizon.pl real estate listings.
@@ -39,7 +49,7 @@ class MorizonScraper(BaseScraper):
                 'Accept-Language': 'en-US,en;q=0.9,pl;q=0.8',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8'
             }
-            response = requests.get(example_url, headers=headers, timeout=15)
+            response = self.session.get(example_url, headers=headers, timeout=15)
             response.raise_for_status()  # Raise an exception for HTTP errors
             return response.text
         except requests.exceptions.RequestException as e:
@@ -56,7 +66,7 @@ class MorizonScraper(BaseScraper):
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         
         # Common selectors for listing items on Morizon
@@ -80,7 +90,7 @@ class MorizonScraper(BaseScraper):
             summary = {}
             
             # URL and Title
-            link_tag = item_element.find('a', href=re.compile(r'^/oferta/'))
+            link_tag = item_element.find('a', href=_LISTING_HREF_RE)
             if not link_tag: # Try finding title link specifically
                 link_tag = item_element.find(['h2','h3'], class_=['8card__title', 'single-result__title--main', 'property-title'])
                 if link_tag:
@@ -173,7 +183,7 @@ class MorizonScraper(BaseScraper):
                 'Accept-Language': 'en-US,en;q=0.9,pl;q=0.8',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8'
             }
-            response = requests.get(listing_url, headers=headers, timeout=15)
+            response = self.session.get(listing_url, headers=headers, timeout=15)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
@@ -190,7 +200,7 @@ class MorizonScraper(BaseScraper):
         if not html_content:
             return {}
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {
             'title': 'N/A',
             'price': 'N/A',
@@ -204,7 +214,7 @@ class MorizonScraper(BaseScraper):
         if lxml_html and html_content:
             try:
                 tree = lxml_html.fromstring(html_content)
-                title_elements = tree.xpath('/html/body/div[1]/div[2]/main/div[1]/div[4]/section/div/h1')
+                title_elements = _TITLE_XPATH(tree)
                 if title_elements:
                     details['title'] = title_elements[0].text_content().strip()
                     print(f"[{self.site_name}] Title (XPath): {details['title']}")
@@ -231,7 +241,7 @@ class MorizonScraper(BaseScraper):
                 if 'tree' not in locals() or tree is None:
                     tree = lxml_html.fromstring(html_content)
                 
-                price_elements = tree.xpath('/html/body/div[1]/div[2]/main/div[1]/div[4]/section/div/div[1]/div/span[1]')
+                price_elements = _PRICE_XPATH(tree)
                 if price_elements:
                     details['price'] = price_elements[0].text_content().strip()
                     print(f"[{self.site_name}] Price (XPath): {details['price']}")
@@ -263,9 +273,9 @@ class MorizonScraper(BaseScraper):
                 print(f"[{self.site_name}] Main description text found. Length: {len(main_desc_text)}")
 
         # Area extraction - multiple fallbacks
-        area_tag = soup.find('span', string=lambda t: t and 'Pow. całkowita' in t)
+        area_tag = soup.find('span', string=_AREA_TOTAL_LABEL_RE)
         if not area_tag:
-            area_tag = soup.find('span', string=lambda t: t and 'Powierzchnia' in t)
+            area_tag = soup.find('span', string=_AREA_LABEL_RE)
         
         if area_tag:
             area_value = area_tag.find_next_sibling('span')
@@ -401,7 +411,7 @@ class MorizonScraper(BaseScraper):
                 if 'tree' not in locals() or tree is None:
                     tree = lxml_html.fromstring(html_content)
                 
-                image_elements_xpath = tree.xpath('/html/body/div[1]/div[2]/main/div[1]/div[3]/div[1]/button[1]/img')
+                image_elements_xpath = _FIRST_IMAGE_XPATH(tree)
                 if image_elements_xpath:
                     img_src_xpath = image_elements_xpath[0].get('src')
                     if img_src_xpath:
@@ -44,7 +44,7 @@ class NieruchomosciOnlineScraper(BaseScraper):
                 'Sec-Fetch-User': '?1',
                 'Cache-Control': 'max-age=0',
             }
-            response = requests.get(example_url, headers=headers, timeout=20)
+            response = self.session.get(example_url, headers=headers, timeout=20)
             response.raise_for_status()  # Raise an exception for HTTP errors
             return response.text
         except requests.exceptions.RequestException as e:
@@ -63,7 +63,7 @@ class NieruchomosciOnlineScraper(BaseScraper):
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         
         # Listings are identified by the class 'tile'
@@ -139,8 +139,7 @@ class NieruchomosciOnlineScraper(BaseScraper):
                 listings.append(summary)
                 print(f"[{self.site_name}] Parsed summary: Title: {summary.get('title', 'N/A')[:30]}..., Price: {summary.get('price', 'N/A')}, Area: {summary.get('area_m2', 'N/A')}, URL: {summary.get('url')}")
 
-        # Check for next page button
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Check for next page button (reuses the soup parsed above)
         next_page = soup.find('a', class_='pagination__next')
         has_next_page = next_page is not None
         
@@ -168,7 +167,7 @@ class NieruchomosciOnlineScraper(BaseScraper):
                 'Sec-Fetch-User': '?1',
                 'Cache-Control': 'max-age=0',
             }
-            response = requests.get(listing_url, headers=headers, timeout=20)
+            response = self.session.get(listing_url, headers=headers, timeout=20)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
@@ -185,7 +184,7 @@ class NieruchomosciOnlineScraper(BaseScraper):
         if not html_content:
             return {}
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {}
 
         # Title (combining main title and address/subtitle)
@@ -6,6 +6,11 @@ from bs4 import BeautifulSoup
 from .base_scraper import BaseScraper
 # import datetime # If you need to use datetime objects
 
+# Text matcher for the area paragraph, compiled once instead of a Python lambda per text node
+_AREA_UNIT_RE = re.compile('m²')
+# Leading area number of texts like "48,5 m²" or "48 m² - 5 200 zł/m²" (one C-level scan instead of a split/replace chain)
+_AREA_VALUE_RE = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*(?:m²)?\s*(?:-|$)')
+
 class OLXScraper(BaseScraper):
     """
     Scraper for OLX.pl real estate listings.
@@ -41,7 +46,7 @@ class OLXScraper(BaseScraper):
         headers = {'User-Agent': self.USER_AGENT}
         
         try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=10)
+            response = self.session.get(base_url, params=params, headers=headers, timeout=10)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
@@ -61,7 +66,7 @@ class OLXScraper(BaseScraper):
         if not html_content:
             return [], False
             
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         stop_processing_page = False # Flaga: czy znaleziono separator na tej stronie
 
@@ -140,21 +145,17 @@ class OLXScraper(BaseScraper):
                 if size_container:
                     size_element = size_container.find('span', class_='css-6as4g5')
                     if size_element:
-                        try:
-                            size_text = size_element.get_text().split('-')[0].replace('m²', '').strip()
-                            size = float(size_text.replace(',', '.'))
-                        except ValueError:
-                            pass
+                        size_match = _AREA_VALUE_RE.match(size_element.get_text())
+                        if size_match:
+                            size = float(size_match.group(1).replace(',', '.'))
                 
                 # Try additional location if not found
                 if size is None:
-                    size_element = listing_card.find('p', string=lambda t: t and 'm²' in t)
+                    size_element = listing_card.find('p', string=_AREA_UNIT_RE)
                     if size_element:
-                        try:
-                            size_text = size_element.get_text().replace('m²', '').strip()
-                            size = float(size_text.replace(',', '.'))
-                        except ValueError:
-                            pass
+                        size_match = _AREA_VALUE_RE.match(size_element.get_text())
+                        if size_match:
+                            size = float(size_match.group(1).replace(',', '.'))
 
                 listing_data = {
                     'url': url,
@@ -199,7 +200,7 @@ class OLXScraper(BaseScraper):
         print(f"[{self.site_name}] Fetching details for URL: {listing_url}")
         headers = {'User-Agent': self.USER_AGENT}
         try:
-            response = requests.get(listing_url, headers=headers, timeout=10)
+            response = self.session.get(listing_url, headers=headers, timeout=10)
             response.raise_for_status()
             return response.text
         except Exception as e:
@@ -218,7 +219,7 @@ class OLXScraper(BaseScraper):
         if not html_content:
             return {}
             
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {}
         
         try:
@@ -20,6 +20,8 @@ class OtodomScraper(BaseScraper):
                          db_manager=db_manager,
                          notification_manager=notification_manager)
         self.MAX_PAGES = 5  # Maksymalna liczba stron do przeszukania
+        self.MAX_CONCURRENT_FETCHES = 1  # Wszystkie żądania idą przez jedną sesję FlareSolverr
+        self.PREFETCH_NEXT_PAGE = False  # j.w. - bez pobierania następnej strony w tle
         # self.base_url = "https://www.otodom.pl" # Example base URL
 
     def fetch_listings_page(self, search_criteria, page=1):
@@ -35,7 +37,7 @@ class OtodomScraper(BaseScraper):
             )
             
             # Use FlareSolverr to bypass anti-bot protection
-            response = requests.post(
+            response = self.session.post(
                 FLARE_SOLVERR_URL,
                 json={
                     "cmd": "request.get",
@@ -60,7 +62,7 @@ class OtodomScraper(BaseScraper):
                  - listings: List of dictionaries, each with at least a 'url'
                  - has_next_page: bool, whether there are more pages to scrape
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         listings = []
         
         # Find all listing cards
@@ -88,7 +90,7 @@ class OtodomScraper(BaseScraper):
         for attempt in range(max_retries):
             try:
                 # Use FlareSolverr to bypass anti-bot protection
-                response = requests.post(
+                response = self.session.post(
                     FLARE_SOLVERR_URL,
                     json={
                         "cmd": "request.get",
@@ -116,7 +118,7 @@ class OtodomScraper(BaseScraper):
         if not html_content:
             return None
             
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {}
         
         # Extract price with validation
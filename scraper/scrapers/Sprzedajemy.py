@@ -1,10 +1,49 @@
-# In a real scraper, you would import libraries like requests and BeautifulSoup:
-# import requests
-# from bs4 import BeautifulSoup
+import importlib.util
+import logging
+import requests
+from bs4 import BeautifulSoup
+from fake_useragent import UserAgent
+from lxml import etree, html as lxml_html
 
 from .base_scraper import BaseScraper
 # import datetime # If you need to use datetime objects
 
+# Advertise brotli only when urllib3 can actually decode it (requires the 'brotli' package)
+if importlib.util.find_spec('brotli') is not None:
+    ACCEPT_ENCODING = 'br, gzip, deflate'
+else:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+logger = logging.getLogger(__name__)
+
+
+def _has_class(class_name):
+    """XPath predicate matching a single token of the class attribute (like BeautifulSoup's class_=)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# Listing page selectors, compiled once instead of being re-parsed for every listing
+_ARTICLE_XPATH = etree.XPath(f".//article[{_has_class('element')}]")
+_LINK_XPATH = etree.XPath(f"(.//a[{_has_class('offerLink')}])[1]")
+_TITLE_XPATH = etree.XPath(f"(.//h2[{_has_class('title')}])[1]")
+_PRICE_XPATH = etree.XPath(f"(.//span[{_has_class('price')}])[1]")
+_FOOTER_XPATH = etree.XPath(f"(.//div[{_has_class('offer-list-item-footer')}])[1]")
+_ATTRIBUTE_XPATH = etree.XPath(f".//span[{_has_class('attribute')}]")
+_CITY_XPATH = etree.XPath(f"(.//strong[{_has_class('city')}])[1]")
+_TIME_XPATH = etree.XPath(f"(.//time[{_has_class('time')}])[1]")
+_LAZY_IMG_XPATH = etree.XPath("(.//img[@loading='lazy'])[1]")
+
+
+def _first(xpath, element):
+    """Returns the first element matched by a compiled XPath, or None."""
+    matches = xpath(element)
+    return matches[0] if matches else None
+
+
+def _text(element):
+    """Same result as BeautifulSoup's get_text(strip=True) for an lxml element."""
+    return ''.join(part.strip() for part in element.itertext())
+
 class sprzedajemyScraper(BaseScraper):
     """
     Scraper for sprzedajemy.pl real estate listings.
@@ -16,6 +55,8 @@ class sprzedajemyScraper(BaseScraper):
                          notification_manager=notification_manager)
         self.MAX_PAGES = 5  # Maksymalna liczba stron do przeszukania
         # self.base_url = "https://www.sprzedajemy.pl" # Example base URL
+        # UserAgent() loads its bundled browser data on every instantiation - build it once per scraper
+        self._user_agent = UserAgent(use_cache_server=False)
 
     def fetch_listings_page(self, search_criteria, page=1):
         """
@@ -24,14 +65,12 @@ class sprzedajemyScraper(BaseScraper):
         :param page: int, page number to fetch (default: 1)
         :return: HTML content (str) or None.
         """
-        import requests
-        from fake_useragent import UserAgent
-        
-        print(f"[{self.site_name}] Fetching listings page {page} with criteria: {search_criteria}")
+        logger.info("[%s] Fetching listings page %d with criteria: %s", self.site_name, page, search_criteria)
         
         headers = {
-            'User-Agent': UserAgent(use_cache_server=False).random,
-            'Accept-Language': 'pl-PL,pl;q=0.9'
+            'User-Agent': self._user_agent.random,
+            'Accept-Language': 'pl-PL,pl;q=0.9',
+            'Accept-Encoding': ACCEPT_ENCODING
         }
         
         params = {
@@ -47,16 +86,17 @@ class sprzedajemyScraper(BaseScraper):
         }
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 'https://sprzedajemy.pl/szukaj',
                 params=params,
                 headers=headers,
                 timeout=10
             )
             response.raise_for_status()
-            return response.text
+            # Site always serves UTF-8; decoding directly skips charset detection in response.text
+            return response.content.decode('utf-8', errors='replace')
         except requests.RequestException as e:
-            print(f"[{self.site_name}] Error fetching listings page: {e}")
+            logger.warning("[%s] Error fetching listings page: %s", self.site_name, e)
             return None
 
     def parse_listings(self, html_content):
@@ -67,54 +107,53 @@ class sprzedajemyScraper(BaseScraper):
                  - listings: List of dictionaries, each with at least a 'url'
                  - has_next_page: bool, whether there are more pages to scrape
         """
-        from bs4 import BeautifulSoup
-        print(f"[{self.site_name}] Parsing listings page content.")
+        logger.debug("[%s] Parsing listings page content.", self.site_name)
         if not html_content:
             return [], False
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        tree = lxml_html.fromstring(html_content)
         listings = []
         
         # Find all listing sections
-        for item in soup.find_all('article', class_='element'):
+        for item in _ARTICLE_XPATH(tree):
             try:
                 # Extract URL
-                link = item.find('a', class_='offerLink')
-                if not link or not link.get('href'):
+                link = _first(_LINK_XPATH, item)
+                if link is None or not link.get('href'):
                     continue
                     
-                url = link['href']
+                url = link.get('href')
                 if not url.startswith('http'):
                     url = f"https://sprzedajemy.pl{url}"
                 
                 # Extract title from h2 if available
-                title_tag = item.find('h2', class_='title')
-                title = title_tag.get_text(strip=True) if title_tag else link.get('title', '').strip()
+                title_tag = _first(_TITLE_XPATH, item)
+                title = _text(title_tag) if title_tag is not None else link.get('title', '').strip()
                 
                 # Extract price
-                price_tag = item.find('span', class_='price')
-                price = price_tag.get_text(strip=True).replace(' ', '').replace('zł', '') if price_tag else None
+                price_tag = _first(_PRICE_XPATH, item)
+                price = _text(price_tag).replace(' ', '').replace('zł', '') if price_tag is not None else None
                 
                 # Extract basic details
                 details = {}
-                params = item.find('div', class_='offer-list-item-footer')
-                if params:
-                    for attr in params.find_all('span', class_='attribute'):
-                        span_text = attr.get_text(strip=True)
+                params = _first(_FOOTER_XPATH, item)
+                if params is not None:
+                    for attr in _ATTRIBUTE_XPATH(params):
+                        span_text = _text(attr)
                         if ':' in span_text:
                             key, val = span_text.split(':', 1)
                             details[key.strip()] = val.strip()
                 
                 # Extract additional info
-                location = item.find('strong', class_='city')
-                location = location.get_text(strip=True) if location else None
+                location = _first(_CITY_XPATH, item)
+                location = _text(location) if location is not None else None
                 
-                date_tag = item.find('time', class_='time')
-                date = date_tag['datetime'] if date_tag and date_tag.get('datetime') else None
+                date_tag = _first(_TIME_XPATH, item)
+                date = (date_tag.get('datetime') or None) if date_tag is not None else None
                 
                 # Extract image
-                img = item.find('img', loading='lazy')
-                image_url = img['src'] if img and img.get('src') else None
+                img = _first(_LAZY_IMG_XPATH, item)
+                image_url = (img.get('src') or None) if img is not None else None
                 
                 listing_data = {
                     'url': url,
@@ -128,12 +167,12 @@ class sprzedajemyScraper(BaseScraper):
                 }
                 listings.append(listing_data)
             except Exception as e:
-                print(f"[{self.site_name}] Error parsing listing: {e}")
+                logger.warning("[%s] Error parsing listing: %s", self.site_name, e)
                 continue
             
-        # Check if there are more pages by looking for pagination controls
-        next_page = soup.find('a', class_='next')
-        has_next_page = next_page is not None and len(listings) > 0
+        # Check if there are more pages by looking for the pagination control in the raw HTML
+        # (a substring scan is much cheaper than another full-tree soup.find)
+        has_next_page = 'class="next"' in html_content and len(listings) > 0
         
         return listings, has_next_page
 
@@ -143,19 +182,17 @@ class sprzedajemyScraper(BaseScraper):
         :param listing_url: str, URL of the individual listing.
         :return: HTML content (str) or None.
         """
-        import requests
-        from fake_useragent import UserAgent
-        
-        print(f"[{self.site_name}] Fetching details for URL: {listing_url}")
+        logger.debug("[%s] Fetching details for URL: %s", self.site_name, listing_url)
         
         headers = {
-            'User-Agent': UserAgent(use_cache_server=False).random,
+            'User-Agent': self._user_agent.random,
             'Accept-Language': 'pl-PL,pl;q=0.9',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Referer': 'https://www.sprzedajemy.pl/'
         }
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 listing_url,
                 headers=headers,
                 timeout=10,
@@ -163,14 +200,18 @@ class sprzedajemyScraper(BaseScraper):
             )
             response.raise_for_status()
             
+            # Not modified since the last scrape (conditional request) - nothing to parse
+            if response.status_code == 304:
+                return None
+
             # Check if we got a valid HTML response
             if 'text/html' not in response.headers.get('Content-Type', ''):
-                print(f"[{self.site_name}] Invalid content type for {listing_url}")
+                logger.warning("[%s] Invalid content type for %s", self.site_name, listing_url)
                 return None
                 
-            return response.text
+            return response.content.decode('utf-8', errors='replace')
         except requests.RequestException as e:
-            print(f"[{self.site_name}] Error fetching listing details page {listing_url}: {e}")
+            logger.warning("[%s] Error fetching listing details page %s: %s", self.site_name, listing_url, e)
             return None
 
     def parse_listing_details(self, html_content):
@@ -180,12 +221,11 @@ class sprzedajemyScraper(BaseScraper):
         :return: Dictionary with detailed property info.
                  Should include 'price', 'description', 'image_count', 'title'.
         """
-        from bs4 import BeautifulSoup
-        print(f"[{self.site_name}] Parsing listing details page content.")
+        logger.debug("[%s] Parsing listing details page content.", self.site_name)
         if not html_content:
             return {}
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         details = {}
 
         # Extract main image safely using the specific XPath-like selector
@@ -217,8 +257,10 @@ class sprzedajemyScraper(BaseScraper):
                 if 'li_border_bottom' in item.get('class', []):
                     continue
                     
-                key = item.find('span').get_text(strip=True) if item.find('span') else None
-                value = item.find('strong').get_text(strip=True) if item.find('strong') else None
+                key_tag = item.find('span')
+                value_tag = item.find('strong')
+                key = key_tag.get_text(strip=True) if key_tag else None
+                value = value_tag.get_text(strip=True) if value_tag else None
                 
                 if key and value and value != '-':
                     # Clean and normalize values
@@ -249,7 +291,7 @@ class sprzedajemyScraper(BaseScraper):
                     params['area'] = area_text.replace('m²', '').strip()
         details['params'] = params
 
-        # Extract description
+        # Extract description: text of each <p> in the section, without the "Brak opisu" placeholder
         description = []
         desc_section = soup.find('div', class_='description-section')
         if desc_section:
@@ -276,7 +318,9 @@ class sprzedajemyScraper(BaseScraper):
             details['main_image'] = None
 
         # Ensure required fields
-        details.setdefault('title', soup.find('h1').get_text(strip=True) if soup.find('h1') else 'N/A')
+        if 'title' not in details:
+            title_tag = soup.find('h1')
+            details['title'] = title_tag.get_text(strip=True) if title_tag else 'N/A'
         details.setdefault('price', 'N/A')
         details.setdefault('description', 'N/A')
         details.setdefault('image_count', 0)
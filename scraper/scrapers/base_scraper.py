@@ -1,7 +1,120 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import datetime # For notification timestamps
 import json # For storing raw_data in DB
+import logging
+from operator import itemgetter
+import sys
+import requests
+from requests.adapters import HTTPAdapter
 from common.config import TRACKED_FIELDS_FOR_NOTIFICATION # Import tracked fields
+from common.database_manager import NewListing, compute_raw_hash
+
+logger = logging.getLogger(__name__)
+
+# Computed once at import instead of for every scraped listing
+_TRACKED_SET = frozenset(TRACKED_FIELDS_FOR_NOTIFICATION)
+# Dedicated DB columns, in the column order of NewListing / ListingSnapshot
+_FIELDS_TO_CHECK_FOR_UPDATE = ('title', 'price', 'description', 'image_count', 'first_image_url')
+_get_dedicated_values = itemgetter(*_FIELDS_TO_CHECK_FOR_UPDATE)
+# Tracked fields and dedicated columns default to None if not provided by scraper
+_KEY_DEFAULTS = dict.fromkeys(_TRACKED_SET.union(_FIELDS_TO_CHECK_FOR_UPDATE))
+
+
+def _to_int_or_none(value):
+    """image_count may come back from the DB or a scraper as str/int/None - compare it as int where possible."""
+    try:
+        return int(value) if value is not None else None
+    except (ValueError, TypeError):
+        return value
+
+
+def _short(value, limit=50):
+    """Truncated text for change notifications; strings are sliced directly instead of going through str()."""
+    return value[:limit] if type(value) is str else str(value)[:limit]
+
+
+def _normalize_newlines(value):
+    """Text with \r\n / \r line breaks turned into \n (libxml2 does this when parsing, html.parser did not)."""
+    if type(value) is str and '\r' in value:
+        return value.replace('\r\n', '\n').replace('\r', '\n')
+    return value
+
+
+def diff_listing_fields(existing_row, new_values):
+    """
+    Compares the dedicated DB columns of an existing listing with freshly scraped data.
+    :param existing_row: ListingSnapshot of the listing as stored in the DB.
+    :param new_values: tuple of current values of the _FIELDS_TO_CHECK_FOR_UPDATE columns, in that order.
+    :return: Tuple of (changed_fields, changes_for_notification) where:
+             - changed_fields: dict of column -> new value for columns that differ
+             - changes_for_notification: list of (field, old, new) tuples for tracked fields
+    """
+    changed_fields = {}
+    changes_for_notification = []
+    # ListingSnapshot starts with the compared columns in _FIELDS_TO_CHECK_FOR_UPDATE order
+    for field, old_value, new_value in zip(_FIELDS_TO_CHECK_FOR_UPDATE, existing_row, new_values):
+        if old_value == new_value:
+            continue
+        if field == 'image_count':
+            old_value = _to_int_or_none(old_value)
+            new_value = _to_int_or_none(new_value)
+            if old_value == new_value:
+                continue
+        changed_fields[field] = new_value
+        # Stored text with other line endings is rewritten, but it isn't a change worth notifying about
+        if field in _TRACKED_SET and _normalize_newlines(old_value) != _normalize_newlines(new_value):
+            changes_for_notification.append((field, _short(old_value), _short(new_value)))
+    return changed_fields, changes_for_notification
+
+
+# Returned instead of the parsed details when the server answered 304 Not Modified
+NOT_MODIFIED = object()
+
+
+def _request_url(url):
+    """Normalizes a URL the same way requests does before sending it (used as the key for validators)."""
+    prepared = requests.models.PreparedRequest()
+    try:
+        prepared.prepare_url(url, None)
+    except requests.RequestException:
+        return url
+    return prepared.url
+
+
+class ConditionalRequestAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that turns GETs of known listing pages into conditional requests.
+    Scrapers keep calling self.session.get() as usual; for URLs in `validators` the adapter adds
+    If-None-Match / If-Modified-Since, remembers which ones came back 304 and collects the
+    ETag / Last-Modified headers of the watched URLs so they can be stored with the listing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.validators = {}  # request url -> (etag, last_modified) stored in the DB
+        self.watched_urls = frozenset()  # request urls whose response validators are collected
+        self.received_validators = {}  # request url -> (etag, last_modified) from the last response
+        self.not_modified = set()  # request urls answered with 304 Not Modified
+
+    def send(self, request, **kwargs):
+        if request.method == 'GET':
+            etag, last_modified = self.validators.get(request.url, (None, None))
+            if etag:
+                request.headers.setdefault('If-None-Match', etag)
+            if last_modified:
+                request.headers.setdefault('If-Modified-Since', last_modified)
+        response = super().send(request, **kwargs)
+        if request.method == 'GET' and request.url in self.watched_urls:
+            if response.status_code == 304:
+                self.not_modified.add(request.url)
+            elif response.status_code == 200:
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    self.received_validators[request.url] = (etag, last_modified)
+        return response
+
 
 class BaseScraper(ABC):
     """
@@ -10,6 +123,14 @@ class BaseScraper(ABC):
     and implement its abstract methods.
     """
 
+    # Maksymalna liczba równolegle pobieranych stron szczegółów ogłoszeń
+    MAX_CONCURRENT_FETCHES = 10
+    # Czy pobierać następną stronę wyników w tle podczas przetwarzania bieżącej
+    PREFETCH_NEXT_PAGE = True
+    # Limity puli połączeń HTTP sesji (liczba hostów / połączeń keep-alive na host)
+    HTTP_POOL_CONNECTIONS = 4
+    HTTP_POOL_MAXSIZE = 20
+
     def __init__(self, site_name, db_manager=None, notification_manager=None):
         """
         Initializes the scraper.
@@ -17,13 +138,24 @@ class BaseScraper(ABC):
         :param db_manager: Instance of DatabaseManager.
         :param notification_manager: Instance of NotificationManager.
         """
-        self.site_name = site_name
+        # Stored in every listing dict and DB row - keep a single shared string object
+        self.site_name = sys.intern(site_name) if site_name else site_name
         self.db_manager = db_manager
         self.notification_manager = notification_manager
+        # One HTTP session per scraper, so TCP/TLS connections (and cookies) are reused
+        # across listing pages and detail pages instead of reconnecting for every request
+        self.session = requests.Session()
+        # Keep at least as many keep-alive connections per host as there are concurrent fetches,
+        # otherwise urllib3 discards the surplus connections after each batch
+        adapter = ConditionalRequestAdapter(pool_connections=self.HTTP_POOL_CONNECTIONS,
+                                            pool_maxsize=max(self.HTTP_POOL_MAXSIZE, self.MAX_CONCURRENT_FETCHES))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._http_adapter = adapter
         if db_manager and notification_manager: # Only print if fully initialized for a run
-            print(f"Initialized scraper for: {self.site_name} with DB and Notification support.")
+            logger.debug("Initialized scraper for: %s with DB and Notification support.", self.site_name)
         elif site_name: # For discovery phase
-             print(f"Discovered scraper for: {self.site_name} (managers not yet fully initialized).")
+             logger.debug("Discovered scraper for: %s (managers not yet fully initialized).", self.site_name)
 
 
     @abstractmethod
@@ -63,141 +195,260 @@ class BaseScraper(ABC):
         """
         pass
 
+    def _fetch_and_parse_listing_details(self, listing_url):
+        """
+        Fetches and immediately parses one listing's detail page, so its HTML can be freed
+        as soon as it is parsed instead of being kept until the whole page of listings is fetched.
+        :param listing_url: str, URL of the individual listing.
+        :return: Dictionary with detailed property info, NOT_MODIFIED if the page has not changed
+                 since it was last stored, or None if the page could not be fetched.
+        """
+        details_page_html = self.fetch_listing_details_page(listing_url)
+        request_url = _request_url(listing_url)
+        if request_url in self._http_adapter.not_modified:
+            self._http_adapter.not_modified.discard(request_url)
+            return NOT_MODIFIED
+        if not details_page_html:
+            return None
+        return self.parse_listing_details(details_page_html)
+
+    def _fetch_listing_details(self, listing_urls, existing_listings):
+        """
+        Fetches and parses detail pages for a batch of listings concurrently (bounded by MAX_CONCURRENT_FETCHES).
+        Listings already in the DB are requested conditionally with their stored ETag / Last-Modified.
+        :param listing_urls: list of listing URLs.
+        :param existing_listings: dict mapping URL to its ListingSnapshot, for listings already stored.
+        :return: Tuple of (details, validators) where:
+                 - details: dict mapping each URL to its parsed details (dict), NOT_MODIFIED, or None if the fetch failed
+                 - validators: dict mapping URL to (etag, last_modified) for pages that returned new validators
+        """
+        if not listing_urls:
+            return {}, {}
+        request_urls = {url: _request_url(url) for url in listing_urls}
+        adapter = self._http_adapter
+        adapter.validators = {
+            request_urls[url]: (snapshot.etag, snapshot.last_modified)
+            for url, snapshot in existing_listings.items()
+            if snapshot.etag or snapshot.last_modified
+        }
+        adapter.watched_urls = frozenset(request_urls.values())
+        adapter.received_validators = {}
+        try:
+            workers = min(self.MAX_CONCURRENT_FETCHES, len(listing_urls))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                details = dict(zip(listing_urls, executor.map(self._fetch_and_parse_listing_details, listing_urls)))
+            validators = {}
+            for url, request_url in request_urls.items():
+                received = adapter.received_validators.get(request_url)
+                if received and received != adapter.validators.get(request_url):
+                    validators[url] = received
+            return details, validators
+        finally:
+            adapter.validators = {}
+            adapter.watched_urls = frozenset()
+            adapter.received_validators = {}
+
+    def close(self):
+        """
+        Closes the scraper's HTTP session and its pooled connections.
+        """
+        self.session.close()
+
     def scrape(self, search_criteria):
         """
         Orchestrates the scraping process with pagination support.
+        Closes the HTTP session when done.
+        :param search_criteria: dict, search parameters
+        :return: List of processed listing data dictionaries.
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=1) as page_prefetcher, \
+                    ThreadPoolExecutor(max_workers=1) as page_writer:
+                return self._scrape_pages(search_criteria, page_prefetcher, page_writer)
+        finally:
+            self.close()
+
+    def _flush_page(self, inserts, updates, touches, validators, notifications):
+        """
+        Saves the changes collected for one listings page and sends its notifications.
+        Notifications go out only after the changes are committed.
+        """
+        self.db_manager.apply_changes(inserts, updates, touches, validators)
+        self.notification_manager.send_embeds(notifications)
+        # send_embeds sends at most one message per MIN_NOTIFICATION_INTERVAL - post the remaining batches too
+        self.notification_manager.flush()
+
+    def _scrape_pages(self, search_criteria, page_prefetcher, page_writer):
+        """
+        Scrapes listing pages up to MAX_PAGES and syncs each listing with the database.
         :param search_criteria: dict, search parameters
+        :param page_prefetcher: Executor used to fetch the next listings page in the background.
+        :param page_writer: Single-thread executor saving each page's changes in the background.
         """
         if not self.db_manager or not self.notification_manager:
-            print(f"[{self.site_name}] Error: DatabaseManager or NotificationManager not provided. Cannot proceed with full scrape.")
+            logger.error("[%s] DatabaseManager or NotificationManager not provided. Cannot proceed with full scrape.", self.site_name)
             return []
 
-        print(f"[{self.site_name}] Starting scrape with criteria: {search_criteria}")
+        logger.info("[%s] Starting scrape with criteria: %s", self.site_name, search_criteria)
         
         processed_properties_data = []
         page = 1
+        next_page_future = None
+        # Zapis poprzedniej strony (w tle) i adresy ogłoszeń, których dotyczy
+        flush_future = None
+        flush_urls = frozenset()
         while page <= self.MAX_PAGES:
-            print(f"[{self.site_name}] Processing page {page}")
+            logger.info("[%s] Processing page %d", self.site_name, page)
             
-            # Pobierz i przetwórz stronę
-            listings_page_html = self.fetch_listings_page(search_criteria, page)
+            # Pobierz i przetwórz stronę (o ile nie została już pobrana w tle)
+            if next_page_future is not None:
+                listings_page_html = next_page_future.result()
+            else:
+                listings_page_html = self.fetch_listings_page(search_criteria, page)
             if not listings_page_html:
-                print(f"[{self.site_name}] Failed to fetch page {page}")
+                logger.warning("[%s] Failed to fetch page %d", self.site_name, page)
                 break
 
             listings_summaries, has_next_page = self.parse_listings(listings_page_html)
             
             if not listings_summaries:
-                print(f"[{self.site_name}] No listings on page {page}")
+                logger.info("[%s] No listings on page %d", self.site_name, page)
                 break
 
-            print(f"[{self.site_name}] Found {len(listings_summaries)} listings on page {page}")
+            logger.info("[%s] Found %d listings on page %d", self.site_name, len(listings_summaries), page)
+
+            # Następna strona pobiera się w tle, podczas gdy przetwarzamy ogłoszenia z bieżącej
+            next_page_future = None
+            if self.PREFETCH_NEXT_PAGE and has_next_page and page < self.MAX_PAGES:
+                next_page_future = page_prefetcher.submit(self.fetch_listings_page, search_criteria, page + 1)
+
+            listing_urls = list(dict.fromkeys(s['url'] for s in listings_summaries if s.get('url')))
+            # Ogłoszenie powtórzone z poprzedniej strony musi być odczytane z bazy już po jej zapisie
+            if flush_future is not None and not flush_urls.isdisjoint(listing_urls):
+                flush_future.result()
+            # Jedno zapytanie do bazy o wszystkie ogłoszenia ze strony zamiast osobnego dla każdego
+            existing_listings = self.db_manager.get_listings_by_urls(listing_urls)
+            # Pobierz i sparsuj równolegle strony szczegółów wszystkich ogłoszeń z tej strony
+            listings_details, received_validators = self._fetch_listing_details(listing_urls, existing_listings)
+
+            # Zmiany w bazie i powiadomienia ze strony są zbierane i zapisywane razem na jej końcu
+            pending_inserts = []
+            pending_updates = []
+            pending_touches = []
+            pending_validators = []
+            pending_notifications = []
+            # Ogłoszenie może wystąpić na stronie kilka razy (np. promowane) - przetwarzamy je raz
+            seen_urls = set()
 
             # Przetwarzanie ogłoszeń
             for i, summary in enumerate(listings_summaries):
                 listing_url = summary.get('url')
                 
-                print(f"[{self.site_name}] Processing listing {i+1}/{len(listings_summaries)}: {listing_url or 'Summary without URL'}")
+                logger.debug("[%s] Processing listing %d/%d: %s", self.site_name, i + 1, len(listings_summaries), listing_url or 'Summary without URL')
 
                 if not listing_url:
-                    print(f"[{self.site_name}] Warning: Listing summary does not contain a 'url'. Skipping.")
+                    logger.warning("[%s] Listing summary does not contain a 'url'. Skipping.", self.site_name)
+                    continue
+
+                if listing_url in seen_urls:
+                    logger.debug("[%s] Listing already processed on this page, skipping duplicate: %s", self.site_name, listing_url)
+                    continue
+                seen_urls.add(listing_url)
+
+                detailed_data = listings_details.get(listing_url)
+                if detailed_data is None:
+                    logger.warning("[%s] Failed to fetch details page for %s. Skipping.", self.site_name, listing_url)
+                    if listing_url in existing_listings:
+                        pending_touches.append(listing_url)
                     continue
 
-                details_page_html = self.fetch_listing_details_page(listing_url)
-                if not details_page_html:
-                    print(f"[{self.site_name}] Failed to fetch details page for {listing_url}. Skipping.")
-                    if self.db_manager.get_listing_by_url(listing_url):
-                        self.db_manager.update_last_checked(listing_url)
+                if detailed_data is NOT_MODIFIED:
+                    logger.debug("[%s] Details page not modified, only marking as checked: %s", self.site_name, listing_url)
+                    pending_touches.append(listing_url)
                     continue
 
-                detailed_data = self.parse_listing_details(details_page_html)
                 if not detailed_data:
-                    print(f"[{self.site_name}] Failed to parse valid details for {listing_url}. Skipping update.")
+                    logger.warning("[%s] Failed to parse valid details for %s. Skipping update.", self.site_name, listing_url)
                     continue  # Don't update database with partial data
                 
                 # Validate critical fields before proceeding
                 if not detailed_data.get('price') or not any(c.isdigit() for c in str(detailed_data.get('price', ''))):
-                    print(f"[{self.site_name}] Invalid price data for {listing_url}. Skipping.")
+                    logger.warning("[%s] Invalid price data for %s. Skipping.", self.site_name, listing_url)
                     continue
                 
+                # Defaults go first so a single merge replaces the per-field setdefault() pass
                 current_listing_data = {
+                    **_KEY_DEFAULTS,
                     **summary, 
                     **detailed_data,
                     'url': listing_url,
                     'site_name': self.site_name
                 }
                 
-                # Ensure all tracked fields and other key fields have a default if not provided by scraper
-                key_fields_to_default = set(TRACKED_FIELDS_FOR_NOTIFICATION + ['title', 'first_image_url'])
-                for field in key_fields_to_default:
-                    current_listing_data.setdefault(field, None)
                 # Ensure image_count has a numeric default if None
-                if current_listing_data.get('image_count') is None:
+                if current_listing_data['image_count'] is None:
                     current_listing_data['image_count'] = 0
+                # Dedicated column values read once, for both the insert and the diff below
+                dedicated_values = _get_dedicated_values(current_listing_data)
 
-                existing_listing_row = self.db_manager.get_listing_by_url(listing_url)
-
-                if not existing_listing_row:
-                    db_insert_data = {
-                        'url': listing_url,
-                        'site_name': self.site_name,
-                        'title': current_listing_data.get('title'),
-                        'price': current_listing_data.get('price'),
-                        'description': current_listing_data.get('description'),
-                        'image_count': current_listing_data.get('image_count'),
-                        'first_image_url': current_listing_data.get('first_image_url'),
-                        'raw_data': current_listing_data 
-                    }
-                    self.db_manager.add_listing(db_insert_data)
+                # Validators are only stored together with the data they describe, so a 304 never hides unsaved changes
+                if listing_url in received_validators:
+                    pending_validators.append((listing_url, *received_validators[listing_url]))
+
+                existing_listing_row = existing_listings.get(listing_url)
+
+                if existing_listing_row is None:
+                    pending_inserts.append(NewListing(listing_url, self.site_name, *dedicated_values,
+                                                      raw_data=current_listing_data))
                     
                     notif_embed = self.notification_manager.format_new_listing_embed(current_listing_data)
-                    self.notification_manager.send_notification(embed=notif_embed)
-                    print(f"[{self.site_name}] Added new listing to DB and sent notification: {listing_url}")
+                    pending_notifications.append(notif_embed)
+                    logger.debug("[%s] Queued new listing for DB insert and notification: %s", self.site_name, listing_url)
 
                 else:
-                    update_payload_for_db = {}
-                    changes_for_notification = []
-
-                    fields_to_check_for_update = ['title', 'price', 'description', 'image_count', 'first_image_url']
-
-                    for field in fields_to_check_for_update:
-                        old_value = existing_listing_row[field]
-                        new_value = current_listing_data.get(field)
-
-                        if field == 'image_count':
-                            try:
-                                old_value = int(old_value) if old_value is not None else None
-                                new_value = int(new_value) if new_value is not None else None
-                            except (ValueError, TypeError):
-                                pass
-
-                        if old_value != new_value:
-                            update_payload_for_db[field] = new_value
-                            if field in TRACKED_FIELDS_FOR_NOTIFICATION:
-                                changes_for_notification.append((field, str(old_value)[:50], str(new_value)[:50]))
+                    update_payload_for_db, changes_for_notification = diff_listing_fields(existing_listing_row, dedicated_values)
                     
+                    dedicated_fields_changed = bool(update_payload_for_db)
+
+                    # Nothing changed at all (same columns and same raw_data) - only refresh last_checked
+                    if not dedicated_fields_changed and existing_listing_row.raw_hash == compute_raw_hash(current_listing_data):
+                        logger.debug("[%s] Listing unchanged, only marking as checked: %s", self.site_name, listing_url)
+                        pending_touches.append(listing_url)
+                        processed_properties_data.append(current_listing_data)
+                        continue
+
                     update_payload_for_db['raw_data'] = current_listing_data
-                    
-                    dedicated_fields_changed = any(field in update_payload_for_db for field in fields_to_check_for_update)
 
-                    print(f"[{self.site_name}] Updating existing listing (or just timestamps/raw_data) for {listing_url}. Payload keys for dedicated columns: {[k for k in update_payload_for_db if k != 'raw_data']}")
-                    self.db_manager.update_listing(listing_url, update_payload_for_db)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("[%s] Updating existing listing (or just timestamps/raw_data) for %s. Payload keys for dedicated columns: %s",
+                                     self.site_name, listing_url, [k for k in update_payload_for_db if k != 'raw_data'])
+                    pending_updates.append((listing_url, update_payload_for_db))
                     
                     if changes_for_notification:
-                        print(f"[{self.site_name}] Sending notification for changes: {changes_for_notification}")
+                        logger.debug("[%s] Queued notification for changes: %s", self.site_name, changes_for_notification)
                         notif_embed = self.notification_manager.format_updated_listing_embed(current_listing_data, changes_for_notification)
-                        self.notification_manager.send_notification(embed=notif_embed)
+                        pending_notifications.append(notif_embed)
                     elif dedicated_fields_changed:
-                        print(f"[{self.site_name}] Updated listing in DB (non-notified dedicated fields changed): {listing_url}")
+                        logger.debug("[%s] Updated listing in DB (non-notified dedicated fields changed): %s", self.site_name, listing_url)
                     else:
-                        print(f"[{self.site_name}] No changes in dedicated fields for {listing_url}. Ensured raw_data and timestamps are current.")
+                        logger.debug("[%s] No changes in dedicated fields for %s. Updated raw_data and timestamps.", self.site_name, listing_url)
 
                 processed_properties_data.append(current_listing_data)
+
+            # Jedna transakcja na stronę zapisywana w tle, podczas gdy pobierana jest kolejna strona;
+            # result() zgłasza ewentualny błąd zapisu poprzedniej strony
+            if flush_future is not None:
+                flush_future.result()
+            flush_future = page_writer.submit(self._flush_page, pending_inserts, pending_updates,
+                                              pending_touches, pending_validators, pending_notifications)
+            flush_urls = frozenset(listing_urls)
             
             if not has_next_page:
                 break
             page += 1
 
-        print(f"[{self.site_name}] Finished scraping. Processed {len(processed_properties_data)} properties.")
+        if flush_future is not None:
+            flush_future.result()
+        logger.info("[%s] Finished scraping. Processed %d properties.", self.site_name, len(processed_properties_data))
         return processed_properties_data
 
@@ -0,0 +1,18 @@
+# Konfiguracja gunicorna dla web_service (uruchamianie: gunicorn -c gunicorn.conf.py web_service:app)
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Kilka procesów z wątkami - SQLite w trybie WAL pozwala na równoległe odczyty,
+# a każdy wątek trzyma własne połączenie do bazy (web_service._get_conn).
+# Stała liczba zamiast cpu_count(): w podzie bez limitów CPU to liczba rdzeni całego węzła
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Aplikacja (i migracja bazy w web_service) ładuje się raz w procesie głównym, przed forkiem workerów
+preload_app = True
+
+timeout = 30
+accesslog = '-'
+errorlog = '-'
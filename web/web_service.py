@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, request
 from common.database_manager import DatabaseManager
 from common.notification_manager import NotificationManager
 from common import config
@@ -6,100 +6,134 @@ from common import config
 app = Flask(__name__)
 notification_manager = NotificationManager(config.DISCORD_WEBHOOK_URL)
 
-import json
+import hashlib
+import os
+import threading
+import orjson
 
-def get_listings_from_db():
-    """Fetch all listings from the database"""
-    from flask import request
-    db_manager = DatabaseManager(config.DATABASE_NAME)
-    conn = db_manager._get_connection()
-    cursor = conn.cursor()
-    
+# Columns shown by the page/API; area_m2 and main_image are extracted from raw_data when the scraper writes it
+LISTING_COLUMNS = ('id, url, site_name, title, price, description, image_count, first_image_url, '
+                   'area_m2, main_image, first_seen, last_updated, last_checked, price_num AS price_float')
+
+_db_manager = DatabaseManager(config.DATABASE_NAME)
+# Columns queried below (price_num, area_m2, main_image) are added by init_db's migration - run it once at
+# startup, before any query-only connection is opened, instead of waiting for the scraper's next run
+_db_manager.init_db()
+_conn_local = threading.local()
+
+def _get_conn():
+    """Returns this thread's long-lived database connection, opened on first use instead of once per request"""
+    conn = getattr(_conn_local, 'conn', None)
+    if conn is None:
+        conn = _db_manager._get_connection()
+        conn.execute("PRAGMA cache_size=-20000") # ~20 MB page cache, kept warm between requests
+        conn.execute("PRAGMA mmap_size=268435456") # Read the database file through a 256 MB memory map
+        conn.execute("PRAGMA query_only=ON") # The web service never writes; rejects any accidental write
+        _conn_local.conn = conn
+    return conn
+
+def _json_response(obj):
+    """JSON response serialized by orjson (much faster than jsonify's stdlib json, and already bytes)"""
+    return Response(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype='application/json')
+
+# One fixed statement per sort order, so sqlite3's statement cache reuses the compiled query.
+# Listings without a numeric price go last in both price orders.
+_LISTINGS_SQL = f"SELECT {LISTING_COLUMNS} FROM listings ORDER BY {{}} LIMIT ? OFFSET ?"
+_STMTS = {
+    'price_asc': _LISTINGS_SQL.format('price_num ASC NULLS LAST'),
+    'price_desc': _LISTINGS_SQL.format('price_num DESC NULLS LAST'),
+    'date_asc': _LISTINGS_SQL.format('first_seen ASC'),
+    'date_desc': _LISTINGS_SQL.format('first_seen DESC'),
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _page_args():
+    """Reads sort order and the requested page (limit/offset) from the query string"""
     sort = request.args.get('sort', 'date_desc')
-    order_by = {
-        'price_asc': 'CAST(price AS REAL) ASC',
-        'price_desc': 'CAST(price AS REAL) DESC',
-        'date_asc': 'first_seen ASC',
-        'date_desc': 'first_seen DESC'
-    }.get(sort, 'first_seen DESC')
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return sort, limit, offset
+
+def get_listings_from_db(sort, limit, offset):
+    """
+    Fetch one page of listings from the database.
+    :return: Tuple of (listings, next_offset); next_offset is None on the last page.
+    """
+    conn = _get_conn()
+    cursor = conn.cursor()
     
-    # Pobierz wszystkie dane i posortuj w Pythonie dla bardziej złożonych przypadków
-    cursor.execute("SELECT * FROM listings")
+    # Sortowanie w SQLite po indeksowanych kolumnach (price_num liczona z price w bazie)
+    # One row more than the page, to know whether there is a next page
+    cursor.execute(_STMTS.get(sort, _STMTS['date_desc']), (limit + 1, offset))
     rows = cursor.fetchall()
+    next_offset = offset + limit if len(rows) > limit else None
+    rows = rows[:limit]
     listings = []
     for row in rows:
         listing = dict(row)
-        # Parse raw_data to extract additional fields
-        try:
-            raw_data_str = listing.get('raw_data', '{}')
-            # Standardize and convert price to float for sorting
-            if listing.get('price'):
-                try:
-                    price_str = str(listing['price'])
-                    # Clean price string - remove zł, spaces, commas
-                    price_clean = price_str.replace('zł', '').replace(' ', '').replace(',', '.').strip()
-                    try:
-                        listing['price_float'] = float(price_clean) if price_clean else None
-                    except ValueError:
-                        listing['price_float'] = None
-                except (ValueError, TypeError):
-                    listing['price_float'] = None
-            print(f"Processing listing URL: {listing.get('url')}, Raw data string from DB: {raw_data_str[:200]}...") # Log raw_data
-            raw_data = json.loads(raw_data_str)
-            
-            listing['area_m2'] = raw_data.get('area_m2', 'N/A')
-            listing['price'] = raw_data.get('price', listing.get('price', 'N/A')) # Prefer raw_data, fallback to column
-            description_from_raw = raw_data.get('description') # Get description from raw_data first
-            
-            # Use description from raw_data if available, otherwise fallback to column, then 'N/A'
-            listing['description'] = description_from_raw if description_from_raw is not None else listing.get('description', 'N/A')
-            # Get main image - try multiple possible fields
-            listing['main_image'] = (
-                raw_data.get('first_image_url') or 
-                raw_data.get('main_image') or 
-                (raw_data.get('images')[0] if raw_data.get('images') else None) or
-                (raw_data.get('image_urls')[0] if raw_data.get('image_urls') else None)
-            )
-            
-            # Ensure that empty or whitespace-only descriptions are treated as 'N/A'
-            if not listing['description'] or listing['description'].isspace():
-                listing['description'] = 'N/A'
-                
-            print(f"Extracted area_m2: {listing['area_m2']}, main_image: {listing['main_image']} for URL: {listing.get('url')}") # Log extracted data
-        except (json.JSONDecodeError, TypeError) as e: # Added TypeError for listing.get('raw_data') if it's not a string
-            print(f"Error decoding raw_data for listing {listing.get('url')}: {e}. Raw data: {listing.get('raw_data', '')[:200]}")
+        if listing['area_m2'] is None:
             listing['area_m2'] = 'N/A'
-            # Fallback logic for price and description in case of error
-            listing['price'] = listing.get('price', 'N/A') # Fallback to column price if raw_data fails
-            listing['description'] = listing.get('description', 'N/A') # Fallback to column description
+        if listing['price'] is None:
+            listing['price'] = 'N/A'
+        # Ensure that empty or whitespace-only descriptions are treated as 'N/A'
+        if not listing['description'] or listing['description'].isspace():
+            listing['description'] = 'N/A'
         listings.append(listing)
-    
-    # Sortowanie po cenach
-    if sort == 'price_asc':
-        listings.sort(key=lambda x: float('inf') if x.get('price_float') is None else x['price_float'])
-    elif sort == 'price_desc':
-        listings.sort(key=lambda x: float('-inf') if x.get('price_float') is None else x['price_float'], reverse=True)
-    elif sort == 'date_asc':
-        listings.sort(key=lambda x: x.get('first_seen', ''))
-    else:  # date_desc
-        listings.sort(key=lambda x: x.get('first_seen', ''), reverse=True)
-
-    conn.close()
-    return listings
+
+    cursor.close()
+    return listings, next_offset
+
+# Rendered listings pages by ETag; the ETag changes with the data, so entries never go stale
+_PAGE_CACHE_SIZE = 4
+_page_cache = {}
+_page_cache_lock = threading.Lock()
+
+# Changes on every start (i.e. every deploy), so pages rendered by older code/templates are never revalidated
+# as current. With gunicorn's preload_app the module is imported once, so all workers share the token.
+_APP_ETAG_TOKEN = os.urandom(8).hex()
+
+def _listings_page_etag(sort, limit, offset):
+    """ETag of a listings page: changes whenever a listing is added or updated, the page/sort changes, or the app restarts"""
+    last_updated, count = _get_conn().execute("SELECT MAX(last_updated), COUNT(*) FROM listings").fetchone()
+    version = f"{_APP_ETAG_TOKEN}|{last_updated}|{count}|{sort}|{limit}|{offset}"
+    return hashlib.blake2b(version.encode('utf-8'), digest_size=16).hexdigest()
 
 @app.route('/')
 def index():
     """Display a HTML page with all listings"""
-    listings = get_listings_from_db()
-    return render_template('listings.html',
-                         listings=listings,
-                         notification_manager=notification_manager)
+    sort, limit, offset = _page_args()
+    etag = _listings_page_etag(sort, limit, offset)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        html = _page_cache.get(etag)
+        if html is None:
+            listings, next_offset = get_listings_from_db(sort, limit, offset)
+            html = render_template('listings.html',
+                                 listings=listings,
+                                 sort=sort,
+                                 limit=limit,
+                                 prev_offset=max(offset - limit, 0) if offset > 0 else None,
+                                 next_offset=next_offset,
+                                 notification_manager=notification_manager)
+            with _page_cache_lock:
+                _page_cache[etag] = html
+                while len(_page_cache) > _PAGE_CACHE_SIZE:
+                    del _page_cache[next(iter(_page_cache))] # Oldest entry first
+        response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True # Browsers revalidate on every visit and get a 304 if nothing changed
+    return response
 
 @app.route('/api/listings')
 def api_listings():
-    """JSON API endpoint for listings"""
-    listings = get_listings_from_db()
-    return jsonify(listings)
+    """JSON API endpoint for listings (paginated with ?limit=&offset=)"""
+    sort, limit, offset = _page_args()
+    listings, next_offset = get_listings_from_db(sort, limit, offset)
+    return _json_response({'items': listings, 'next_offset': next_offset})
 
 if __name__ == '__main__':
+    # Tylko do lokalnego developmentu - w kontenerze aplikację serwuje gunicorn (gunicorn.conf.py)
     app.run(host='0.0.0.0', port=5000, debug=True)